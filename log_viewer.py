@@ -3,20 +3,60 @@
 The widget tails the monitor log(s) and provides an inactivity watchdog so the
 user can tell at a glance when new data arrives.  The implementation avoids
 continuous polling by combining a ``QTimer`` for coarse refreshes with
-``QFileSystemWatcher`` notifications when the underlying file changes.
+``QFileSystemWatcher`` notifications when the underlying file changes.  The
+actual reads happen in a worker on a ``QThread`` so disk latency never blocks
+the GUI thread.
 """
 
 from __future__ import annotations
 
-import io
+import codecs
+import functools
 import os
+import re
+import sys
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Callable, Optional, Tuple
+from typing import Callable, Optional, Pattern, Tuple
 
 from qgis.PyQt import QtCore, QtGui, QtWidgets
 
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except Exception:
+    INotify = None
+    inotify_flags = None
+
+
+READ_CHUNK = 1 << 20
+HISTORY_LINES = 50_000
+INOTIFY_FALLBACK_SEC = 5.0
+_ASCII_LOWER = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+NETWORK_FS_TYPES = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "fuse.sshfs", "9p", "afs"}
+
+
+def _is_network_path(path: str) -> bool:
+    """Return True when *path* lives on a mount where inotify events are unreliable."""
+    return _is_network_dir(os.path.dirname(os.path.abspath(path)))
+
+
+@functools.lru_cache(maxsize=32)
+def _is_network_dir(directory: str) -> bool:
+    # Cached per directory: /proc/mounts is only read once for each log folder.
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as mounts:
+            entries = [line.split()[1:3] for line in mounts if line.count(" ") >= 2]
+    except Exception:
+        return False
+    best, fstype = "", ""
+    for mount_point, kind in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        if (directory == mount_point or directory.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype in NETWORK_FS_TYPES
+
 
 @dataclass
 class FileSnapshot:
@@ -28,60 +68,182 @@ class FileSnapshot:
 class _TailSession:
     def __init__(self, path: str) -> None:
         self.path = path
-        self.handle: Optional[io.TextIOBase] = None
+        self.fd: Optional[int] = None
         self.position = 0
         self.snapshot: Optional[FileSnapshot] = None
+        self.last_stat: Optional[os.stat_result] = None
+        self.inode: Optional[int] = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")("ignore")
+        self._partial = ""
 
     def open(self, reset: bool = False) -> None:
-        if self.handle:
-            try:
-                self.handle.close()
-            except Exception:
-                pass
-        self.handle = io.open(self.path, "r", encoding="utf-8", errors="ignore")
-        if reset:
-            self.position = 0
-        else:
-            self.handle.seek(0, os.SEEK_END)
-            self.position = self.handle.tell()
+        self.close()
+        self.fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self.position = os.lseek(self.fd, 0, os.SEEK_SET if reset else os.SEEK_END)
+        self._decoder.reset()
+        self._partial = ""
         self.snapshot = self._stat()
+        self.inode = self.last_stat.st_ino if self.last_stat else None
 
     def close(self) -> None:
-        if self.handle:
+        if self.fd is not None:
             try:
-                self.handle.close()
-            except Exception:
+                os.close(self.fd)
+            except OSError:
                 pass
-        self.handle = None
+        self.fd = None
         self.snapshot = None
+        self.last_stat = None
+        self.inode = None
 
     def _stat(self) -> Optional[FileSnapshot]:
         try:
-            stat = os.stat(self.path)
-            return FileSnapshot(self.path, stat.st_size, stat.st_mtime)
+            stat = os.fstat(self.fd)
         except Exception:
             return None
+        self.last_stat = stat
+        return FileSnapshot(self.path, stat.st_size, stat.st_mtime)
 
-    def read_new(self) -> str:
-        if not self.handle:
-            return ""
-        data = self.handle.read()
-        self.position = self.handle.tell()
-        self.snapshot = self._stat()
-        return data
+    def _rotated(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except OSError:
+            # Mid-rotation the name may briefly not exist; keep reading the old file.
+            return False
+
+    def read_new(self, prefilter: Optional[Callable[[bytes], bool]] = None) -> Tuple[str, bool]:
+        """Return ``(complete_lines, may_match)``; *may_match* is False when *prefilter* rejected the chunk."""
+        if self.fd is None:
+            return "", True
+        snapshot = self._stat()
+        if snapshot and snapshot.size < self.position:
+            # Truncated in place: start over from the beginning.
+            self.position = os.lseek(self.fd, 0, os.SEEK_SET)
+            self._decoder.reset()
+            self._partial = ""
+        elif snapshot and snapshot.size == self.position:
+            if not self._rotated():
+                # Nothing appended since the last poll; skip the read syscall.
+                self.snapshot = snapshot
+                return "", True
+            # The old file is fully drained and a new one took its name: follow it from the start.
+            self.open(reset=True)
+            snapshot = self.snapshot
+        chunks = []
+        while True:
+            buf = os.read(self.fd, READ_CHUNK)
+            if not buf:
+                break
+            chunks.append(buf)
+            self.position += len(buf)
+            if len(buf) < READ_CHUNK:
+                break
+        if snapshot:
+            snapshot.size = max(snapshot.size, self.position)
+        self.snapshot = snapshot
+        if not chunks:
+            return "", True
+        raw = b"".join(chunks)
+        # A rejected chunk is still handed out so the history stays complete; only the
+        # per-line filtering and the view append are skipped for it.
+        may_match = prefilter is None or bool(self._partial) or prefilter(raw)
+        # Hand out complete lines only; an unfinished last line waits for the next poll.
+        data = self._partial + self._decoder.decode(raw)
+        head, newline, self._partial = data.rpartition("\n")
+        return head + newline, may_match
+
+
+class _TailWorker(QtCore.QObject):
+    """Owns the tail session and performs all file reads on a background thread."""
+
+    newData = QtCore.pyqtSignal(str, object, bool)
+    opened = QtCore.pyqtSignal(str, object)
+    failed = QtCore.pyqtSignal(str, str)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._session: Optional[_TailSession] = None
+        self._prefilter: Optional[Callable[[bytes], bool]] = None
+
+    @QtCore.pyqtSlot(object)
+    def set_filter(self, needles: Tuple[Optional[bytes], Optional[bytes]]) -> None:
+        """Install byte needles (level tag, lowercased ASCII text) for chunk rejection."""
+        level, text = needles
+        if level is None and text is None:
+            self._prefilter = None
+            return
+
+        def prefilter(raw: bytes) -> bool:
+            if level is not None and level not in raw:
+                return False
+            return text is None or text in raw.translate(_ASCII_LOWER)
+
+        self._prefilter = prefilter
+
+    @QtCore.pyqtSlot(str, bool)
+    def open_path(self, path: str, reset: bool) -> None:
+        self.close()
+        session = _TailSession(path)
+        try:
+            session.open(reset)
+        except Exception as exc:
+            self.failed.emit(path, str(exc))
+            return
+        self._session = session
+        self.opened.emit(path, session.snapshot)
+
+    @QtCore.pyqtSlot()
+    def poll(self) -> None:
+        if not self._session:
+            return
+        before = self._session.position
+        try:
+            data, may_match = self._session.read_new(self._prefilter)
+        except OSError:
+            return
+        if data or self._session.position != before:
+            self.newData.emit(data, self._session.snapshot, may_match)
+
+    @QtCore.pyqtSlot()
+    def close(self) -> None:
+        if self._session:
+            self._session.close()
+        self._session = None
 
 
 class LiveLogDock(QtWidgets.QDockWidget):
+    _request_open = QtCore.pyqtSignal(str, bool)
+    _request_poll = QtCore.pyqtSignal()
+    _request_filter = QtCore.pyqtSignal(object)
+
     def __init__(self, parent=None, get_paths: Optional[Callable[[], Tuple[Optional[str], Optional[str]]]] = None) -> None:
         super().__init__("QGIS Monitor Pro — Live Log", parent)
         self.setObjectName("QGM_LiveLogDock")
         self.setAllowedAreas(QtCore.Qt.LeftDockWidgetArea | QtCore.Qt.RightDockWidgetArea)
 
         self._resolve_paths = get_paths or (lambda: (None, None))
-        self._session: Optional[_TailSession] = None
+        self._snapshot: Optional[FileSnapshot] = None
         self._current_path: Optional[str] = None
+        self._current_dir = ""
+        self._current_name = ""
+        self._pending: list = []
+        self._flush_scheduled = False
+        self._backlog: deque = deque(maxlen=5000)
+        self._history: deque = deque(maxlen=HISTORY_LINES)
+        self._last_status_key: Optional[tuple] = None
+        self._idle_style_on = False
+        self._inotify = None
+        self._inotify_file_wd: Optional[int] = None
+        self._inotify_dir_wd: Optional[int] = None
+        self._inotify_path: Optional[str] = None
+        self._watched_dir: Optional[str] = None
+        self._watched_file: Optional[str] = None
         self._last_activity = 0.0
         self._paused = False
+        self._filter_re: Optional[Pattern[str]] = None
+        self._level_tag: Optional[str] = None
+        self._filter_text_lower: Optional[str] = None
+        self._line_filter: Optional[Callable[[str], bool]] = None
 
         container = QtWidgets.QWidget(self)
         layout = QtWidgets.QVBoxLayout(container)
@@ -98,21 +260,28 @@ class LiveLogDock(QtWidgets.QDockWidget):
         self.auto_checkbox = QtWidgets.QCheckBox("Auto-refresh")
         self.auto_checkbox.setChecked(True)
         self.interval_spin = QtWidgets.QDoubleSpinBox()
-        self.interval_spin.setRange(0.2, 10.0)
+        self.interval_spin.setRange(0.5, 10.0)
         self.interval_spin.setDecimals(1)
-        self.interval_spin.setSingleStep(0.2)
+        self.interval_spin.setSingleStep(0.5)
         self.interval_spin.setValue(1.0)
         self.interval_spin.setSuffix(" s")
         self.pause_button = QtWidgets.QPushButton("Pauze")
         self.clear_button = QtWidgets.QPushButton("Clear")
         self.open_button = QtWidgets.QPushButton("Open map")
         self.pick_button = QtWidgets.QPushButton("Kies bestand")
+        self.max_lines_spin = QtWidgets.QSpinBox()
+        self.max_lines_spin.setRange(500, 100000)
+        self.max_lines_spin.setSingleStep(500)
+        self.max_lines_spin.setValue(5000)
+        self.max_lines_spin.setSuffix(" regels")
+        self.max_lines_spin.setToolTip("Maximaal aantal regels in de viewer; oudste regels vallen eraf.")
 
         controls.addWidget(QtWidgets.QLabel("Level:"))
         controls.addWidget(self.level_combo)
         controls.addWidget(self.filter_edit, 1)
         controls.addWidget(self.auto_checkbox)
         controls.addWidget(self.interval_spin)
+        controls.addWidget(self.max_lines_spin)
         controls.addWidget(self.pause_button)
         controls.addWidget(self.clear_button)
         controls.addWidget(self.open_button)
@@ -121,6 +290,7 @@ class LiveLogDock(QtWidgets.QDockWidget):
         self.view = QtWidgets.QPlainTextEdit()
         self.view.setReadOnly(True)
         self.view.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.view.setMaximumBlockCount(self.max_lines_spin.value())
         layout.addWidget(self.view, 1)
 
         self.status_label = QtWidgets.QLabel("—")
@@ -128,24 +298,59 @@ class LiveLogDock(QtWidgets.QDockWidget):
 
         self.setWidget(container)
 
+        # Coarse timers let the OS batch wakeups instead of raising the timer resolution.
         self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setTimerType(QtCore.Qt.CoarseTimer)
         self.refresh_timer.timeout.connect(self._tick)
         self._apply_interval()
         self.refresh_timer.start()
 
         self.watchdog_timer = QtCore.QTimer(self)
+        self.watchdog_timer.setTimerType(QtCore.Qt.CoarseTimer)
         self.watchdog_timer.setInterval(3000)
         self.watchdog_timer.timeout.connect(self._watchdog_tick)
         self.watchdog_timer.start()
 
+        self._tail_thread = QtCore.QThread(self)
+        self._worker = _TailWorker()
+        self._worker.moveToThread(self._tail_thread)
+        self._request_open.connect(self._worker.open_path)
+        self._request_poll.connect(self._worker.poll)
+        self._request_filter.connect(self._worker.set_filter)
+        self._worker.newData.connect(self._on_new_data, QtCore.Qt.QueuedConnection)
+        self._worker.opened.connect(self._on_opened, QtCore.Qt.QueuedConnection)
+        self._worker.failed.connect(self._on_open_failed, QtCore.Qt.QueuedConnection)
+        self._tail_thread.start()
+
         self.fs_watcher = QtCore.QFileSystemWatcher(self)
         self.fs_watcher.fileChanged.connect(self._on_file_changed)
         self.fs_watcher.directoryChanged.connect(self._on_directory_changed)
 
+        # On Linux, watch only the log file itself through inotify; a directory
+        # watch would wake us up for every unrelated file in the log folder.
+        if INotify is not None and sys.platform.startswith("linux"):
+            try:
+                self._inotify = INotify()
+                self._inotify_notifier = QtCore.QSocketNotifier(self._inotify.fd, QtCore.QSocketNotifier.Read, self)
+                self._inotify_notifier.activated.connect(self._on_inotify)
+            except Exception:
+                self._inotify = None
+
         self.auto_checkbox.toggled.connect(self._toggle_auto)
         self.interval_spin.valueChanged.connect(self._apply_interval)
+        self.max_lines_spin.valueChanged.connect(self._apply_max_lines)
+        self.view.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        # Debounce typing so a burst of keystrokes rebuilds the filter only once.
+        self._filter_debounce = QtCore.QTimer(self)
+        self._filter_debounce.setSingleShot(True)
+        self._filter_debounce.setInterval(150)
+        self._filter_debounce.setTimerType(QtCore.Qt.CoarseTimer)
+        self._filter_debounce.timeout.connect(self._rebuild_filter)
+        self.level_combo.currentIndexChanged.connect(self._rebuild_filter)
+        self.filter_edit.textChanged.connect(lambda _text: self._filter_debounce.start())
+        self._rebuild_filter()
         self.pause_button.clicked.connect(self._toggle_pause)
-        self.clear_button.clicked.connect(self.view.clear)
+        self.clear_button.clicked.connect(self._clear_view)
         self.open_button.clicked.connect(self._open_folder)
         self.pick_button.clicked.connect(self._pick_file)
 
@@ -154,7 +359,77 @@ class LiveLogDock(QtWidgets.QDockWidget):
     # ------------------------------------------------------------------
 
     def _apply_interval(self) -> None:
-        self.refresh_timer.setInterval(int(self.interval_spin.value() * 1000))
+        seconds = self.interval_spin.value()
+        if self._inotify_file_wd is not None or self._inotify_dir_wd is not None:
+            # inotify wakes us on every write; the timer only has to notice a new session file.
+            seconds = max(seconds, INOTIFY_FALLBACK_SEC)
+        self.refresh_timer.setInterval(int(seconds * 1000))
+
+    def _apply_max_lines(self, value: int) -> None:
+        self.view.setMaximumBlockCount(value)
+        self._backlog = deque(self._backlog, maxlen=value)
+
+    def _on_scrolled(self, value: int) -> None:
+        if self._backlog and value == self.view.verticalScrollBar().maximum():
+            self._drain_backlog()
+
+    def _rebuild_filter(self) -> None:
+        """Normalise the filter widgets once and build the per-line predicate."""
+        level = self.level_combo.currentText()
+        text = self.filter_edit.text().strip()
+        self._level_tag = None if level == "ALL" else f"[{level}]"
+        self._filter_text_lower = text.lower() or None
+        parts = []
+        if self._level_tag:
+            parts.append(rf"(?=.*{re.escape(self._level_tag)})")
+        if text:
+            parts.append(rf"(?=.*(?i:{re.escape(text)}))")
+        self._filter_re = re.compile("".join(parts)) if parts else None
+        if self._filter_re is None:
+            self._line_filter = None
+        elif text:
+            self._line_filter = self._filter_re.match
+        else:
+            # Level only: a plain substring test beats the regex.
+            tag = self._level_tag
+            self._line_filter = lambda line: tag in line
+        level_needle = self._level_tag.encode("ascii") if self._level_tag else None
+        text_needle = self._filter_text_lower.encode("ascii") if text and text.isascii() else None
+        self._request_filter.emit((level_needle, text_needle))
+        self._refilter()
+
+    def _refilter(self) -> None:
+        """Re-render the view from the in-memory history using the current filter."""
+        if not self._history:
+            return
+        match = self._line_filter
+        limit = self.view.maximumBlockCount()
+        if match is None:
+            # Het view houdt toch maar maximumBlockCount() regels; de rest niet opmaken
+            lines = deque(self._history, maxlen=limit)
+        else:
+            # Van achter naar voren filteren en stoppen zodra het view vol is
+            lines = deque(maxlen=limit)
+            for line in reversed(self._history):
+                if match(line):
+                    lines.appendleft(line)
+                    if len(lines) >= limit:
+                        break
+        self._pending.clear()
+        self._backlog.clear()
+        self.view.setUpdatesEnabled(False)
+        try:
+            self.view.setPlainText("\n".join(lines))
+        finally:
+            self.view.setUpdatesEnabled(True)
+        bar = self.view.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def _clear_view(self) -> None:
+        self.view.clear()
+        self._history.clear()
+        self._pending.clear()
+        self._backlog.clear()
 
     def _toggle_auto(self, enabled: bool) -> None:
         if enabled and not self._paused:
@@ -189,17 +464,26 @@ class LiveLogDock(QtWidgets.QDockWidget):
     def _switch_file(self, path: str, reset: bool = False) -> None:
         if not path:
             return
-        try:
-            session = _TailSession(path)
-            session.open(reset)
-            self._session = session
-            self._current_path = path
-            self._last_activity = time.time()
-            self._watch_file(path)
-            self._update_status()
-        except Exception as exc:
-            self._session = None
-            self.status_label.setText(f"Kon bestand niet openen: {exc}")
+        self._current_path = path
+        self._current_dir = os.path.dirname(path) or os.getcwd()
+        self._current_name = os.path.basename(path)
+        self._snapshot = None
+        self._watch_file(path)
+        self._request_open.emit(path, reset)
+
+    def _on_opened(self, path: str, snapshot: Optional[FileSnapshot]) -> None:
+        if path != self._current_path:
+            return
+        self._snapshot = snapshot
+        self._last_activity = time.time()
+        self._update_status()
+
+    def _on_open_failed(self, path: str, error: str) -> None:
+        if path != self._current_path:
+            return
+        self._current_path = None
+        self._last_status_key = None
+        self.status_label.setText(f"Kon bestand niet openen: {error}")
 
     def _tick(self) -> None:
         if self._paused:
@@ -210,80 +494,218 @@ class LiveLogDock(QtWidgets.QDockWidget):
                 self._switch_file(path, reset=False)
             else:
                 self._watch_file(path)
-        if not self._session or not self._session.handle:
+        if self._current_path:
+            self._request_poll.emit()
+
+    def _on_new_data(self, data: str, snapshot: Optional[FileSnapshot], may_match: bool = True) -> None:
+        if snapshot and snapshot.path != self._current_path:
             return
-        data = self._session.read_new()
-        if data:
-            self._append_text(data)
-            self._last_activity = time.time()
+        self._snapshot = snapshot
+        self._last_activity = time.time()
+        lines = data.splitlines()
+        self._history.extend(lines)
+        bar = self.view.verticalScrollBar()
+        if not may_match:
+            # The worker's byte prefilter ruled out every line: history only.
             self._update_status()
+            return
+        if not self.isVisible() or bar.value() != bar.maximum():
+            # Nobody is watching the tail: park raw lines and skip filtering/layout.
+            self._backlog.extend(lines)
+        else:
+            self._append_text(data)
+        self._update_status()
+
+    def _drain_backlog(self) -> None:
+        data = "\n".join(self._backlog)
+        self._backlog.clear()
+        self._append_text(data)
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled:
+            # Everything arriving within 50 ms lands in the view as one append.
+            self._flush_scheduled = True
+            QtCore.QTimer.singleShot(50, QtCore.Qt.CoarseTimer, self._flush_pending)
+
+    def _flush_pending(self) -> None:
+        self._flush_scheduled = False
+        if not self._pending or not self.isVisible():
+            return
+        # Follow mode: only stick to the bottom when the user has not scrolled up.
+        bar = self.view.verticalScrollBar()
+        follow = bar.value() == bar.maximum()
+        # Suspend repaints so the insert and the block-count eviction cost one layout.
+        self.view.setUpdatesEnabled(False)
+        try:
+            self.view.appendPlainText("\n".join(self._pending))
+        finally:
+            self.view.setUpdatesEnabled(True)
+        self._pending.clear()
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        if self._backlog:
+            self._drain_backlog()
+        elif self._pending:
+            self._schedule_flush()
+
+    def shutdown(self) -> None:
+        """Stop the timers and the tail thread; call before discarding the dock."""
+        self.refresh_timer.stop()
+        self.watchdog_timer.stop()
+        self._tail_thread.quit()
+        self._tail_thread.wait(2000)
+        self._worker.close()
+        if self._inotify is not None:
+            self._inotify_notifier.setEnabled(False)
+            self._inotify.close()
+            self._inotify = None
 
     def _append_text(self, data: str) -> None:
-        level_filter = self.level_combo.currentText()
-        text_filter = self.filter_edit.text().strip().lower()
-        block = []
-        for line in data.splitlines():
-            if level_filter != "ALL" and f"[{level_filter}]" not in line:
-                continue
-            if text_filter and text_filter not in line.lower():
-                continue
-            block.append(line)
-        if block:
-            cursor = self.view.textCursor()
-            cursor.movePosition(QtGui.QTextCursor.End)
-            cursor.insertText("\n".join(block) + "\n")
-            self.view.verticalScrollBar().setValue(self.view.verticalScrollBar().maximum())
+        match = self._line_filter
+        if match is None:
+            # No filter: hand the whole chunk over without any per-line work.
+            block = data.replace("\r\n", "\n").rstrip("\n")
+        else:
+            block = "\n".join(line for line in data.splitlines() if match(line))
+        if not block:
+            return
+        self._pending.append(block)
+        # Bound the buffer by the view's block limit (each entry holds at least one line).
+        excess = len(self._pending) - self.view.maximumBlockCount()
+        if excess > 0:
+            del self._pending[:excess]
+        self._schedule_flush()
 
     def _watch_file(self, path: str) -> None:
-        try:
-            self.fs_watcher.removePaths(self.fs_watcher.files())
-        except Exception:
-            pass
-        try:
-            self.fs_watcher.removePaths(self.fs_watcher.directories())
-        except Exception:
-            pass
-        if path:
-            directory = os.path.dirname(path) or os.getcwd()
-            if os.path.isdir(directory):
+        # Only touch the watch lists when the target actually changed; every
+        # add/remove is a syscall and _tick calls this on every path change.
+        if path and path == self._inotify_path and (
+            self._inotify_file_wd is not None
+            or (self._inotify_dir_wd is not None and not os.path.exists(path))
+        ):
+            # Still watching the file, or still waiting in its directory for it to appear.
+            return
+        if path and self._inotify is not None and not _is_network_path(path):
+            self._set_fs_watch(None, None)
+            self._clear_inotify()
+            self._inotify_watch(path)
+            self._inotify_path = path
+        else:
+            self._clear_inotify()
+            directory = (os.path.dirname(path) or os.getcwd()) if path else None
+            self._set_fs_watch(
+                directory if directory and os.path.isdir(directory) else None,
+                path if path and os.path.exists(path) else None,
+            )
+        self._apply_interval()
+
+    def _set_fs_watch(self, directory: Optional[str], path: Optional[str]) -> None:
+        if directory != self._watched_dir:
+            if self._watched_dir:
+                self.fs_watcher.removePath(self._watched_dir)
+            if directory:
                 self.fs_watcher.addPath(directory)
-            if os.path.exists(path):
+            self._watched_dir = directory
+        # QFileSystemWatcher silently drops files that get removed, so re-check membership.
+        if path != self._watched_file or (path and path not in self.fs_watcher.files()):
+            if self._watched_file and self._watched_file in self.fs_watcher.files():
+                self.fs_watcher.removePath(self._watched_file)
+            if path:
                 self.fs_watcher.addPath(path)
+            self._watched_file = path
 
     def _on_file_changed(self, path: str) -> None:
-        if self._session and path == self._session.path:
+        if path == self._current_path:
             self._tick()
 
     def _on_directory_changed(self, directory: str) -> None:
-        if self._current_path and os.path.dirname(self._current_path) == directory:
+        if self._current_path and self._current_dir == directory:
             if os.path.exists(self._current_path):
-                self.fs_watcher.addPath(self._current_path)
+                self._set_fs_watch(self._watched_dir, self._current_path)
             self._tick()
 
+    def _clear_inotify(self) -> None:
+        if self._inotify is None:
+            return
+        for wd in (self._inotify_file_wd, self._inotify_dir_wd):
+            if wd is not None:
+                try:
+                    self._inotify.rm_watch(wd)
+                except OSError:
+                    pass
+        self._inotify_file_wd = self._inotify_dir_wd = None
+        self._inotify_path = None
+
+    def _inotify_watch(self, path: str) -> None:
+        try:
+            if os.path.exists(path):
+                mask = inotify_flags.MODIFY | inotify_flags.CLOSE_WRITE | inotify_flags.MOVE_SELF | inotify_flags.DELETE_SELF
+                self._inotify_file_wd = self._inotify.add_watch(path, mask)
+            else:
+                # Only while the file is missing (rotation), wait for it to be created.
+                directory = os.path.dirname(path) or os.getcwd()
+                if os.path.isdir(directory):
+                    self._inotify_dir_wd = self._inotify.add_watch(directory, inotify_flags.CREATE | inotify_flags.MOVED_TO)
+        except OSError:
+            pass
+
+    def _on_inotify(self) -> None:
+        if self._inotify is None:
+            return
+        try:
+            events = self._inotify.read(timeout=0)
+        except OSError:
+            return
+        gone = inotify_flags.MOVE_SELF | inotify_flags.DELETE_SELF | inotify_flags.IGNORED
+        name = self._current_name
+        recreated = False
+        for event in events:
+            if event.wd == self._inotify_file_wd and event.mask & gone:
+                self._inotify_file_wd = None
+                recreated = True
+            elif event.wd == self._inotify_dir_wd and event.name == name:
+                recreated = True
+        self._tick()
+        if recreated and self._current_path:
+            # The poll queued above drains the old file's unread tail first; once it is
+            # exhausted the session sees the new inode and follows the new file itself.
+            self._watch_file(self._current_path)
+            if not self._paused:
+                self._request_poll.emit()
+
     # ------------------------------------------------------------------
     # Status / watchdog
     # ------------------------------------------------------------------
 
     def _update_status(self) -> None:
         if not self._current_path:
+            key = None
+        else:
+            snapshot = self._snapshot
+            idle = int(time.time() - self._last_activity)
+            key = (self._current_name, snapshot.size if snapshot else 0, int(snapshot.modified) if snapshot else None, idle)
+        # QLabel.setText invalidates the layout; skip it when nothing visible changed.
+        if key == self._last_status_key and key is not None:
+            return
+        self._last_status_key = key
+        if key is None:
             self.status_label.setText("Geen actief logbestand")
             return
-        snapshot = self._session.snapshot if self._session else None
-        size = snapshot.size if snapshot else 0
-        timestamp = datetime.fromtimestamp(snapshot.modified).strftime("%H:%M:%S") if snapshot else "—"
-        idle = time.time() - self._last_activity
-        self.status_label.setText(
-            f"{os.path.basename(self._current_path)} — {size:,} bytes — laatst gewijzigd {timestamp} — idle {idle:.1f}s"
-        )
+        name, size, modified, idle = key
+        timestamp = datetime.fromtimestamp(modified).strftime("%H:%M:%S") if modified is not None else "—"
+        self.status_label.setText(f"{name} — {size:,} bytes — laatst gewijzigd {timestamp} — idle {idle}s")
 
     def _watchdog_tick(self) -> None:
-        if not self._session:
+        if not self._current_path:
             return
-        idle = time.time() - self._last_activity
-        if idle > 10:
-            self.status_label.setStyleSheet("color: #d9534f;")
-        else:
-            self.status_label.setStyleSheet("")
+        idle_alert = time.time() - self._last_activity > 10
+        if idle_alert != self._idle_style_on:
+            # setStyleSheet forces a style recompute, so only call it when the state flips.
+            self._idle_style_on = idle_alert
+            self.status_label.setStyleSheet("color: #d9534f;" if idle_alert else "")
 
 
 __all__ = ["LiveLogDock"]
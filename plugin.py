@@ -1,23 +1,51 @@
 # -*- coding: utf-8 -*-
+import functools
 import logging
 import os
+import sys
 
 from qgis.PyQt.QtCore import Qt, QTimer, QUrl
 from qgis.PyQt.QtGui import QDesktopServices, QIcon
 from qgis.PyQt.QtWidgets import QAction, QMessageBox, QToolBar
-from qgis.core import QgsApplication
+from qgis.core import QgsApplication, QgsTask
 
-from .log_viewer import LiveLogDock
-from .qgis_monitor import ERR_PATH, LOG_FILE, make_diagnostics_zip, qgismonitor_start, qgismonitor_stop
-from .settings_ui import SettingsDialog
-from .utils import get_log_dir, get_setting, write_diagnostics_txt
+from .utils import get_log_dir, get_setting
 
 
 ICON_DIR = os.path.dirname(__file__)
+_ICON_DIR_JOIN = ICON_DIR + os.sep
+_TITLE = "QGIS Monitor Pro"
+ICON_PATHS = {
+    name: _ICON_DIR_JOIN + name
+    for name in ("icon.png", "icon_settings.png", "icon_diag.png", "icon_folder.png", "icon_start.png", "icon_stop.png")
+}
 
 
-def ico(name):
-    return QIcon(os.path.join(ICON_DIR, name))
+def _qm():
+    # De engine pas laden als de monitor of de live viewer echt gebruikt wordt
+    from . import qgis_monitor
+    return qgis_monitor
+
+
+def _flush_engine():
+    # Alleen als de engine al geladen is: gebufferde logregels naar schijf voordat er gelezen wordt
+    qm = sys.modules.get(__package__ + ".qgis_monitor")
+    if qm is not None:
+        qm.sync_flush()
+
+
+def _monitor_paths():
+    # Live gelezen: LOG_FILE/ERR_PATH worden pas bij het starten van de monitor gezet
+    qm = _qm()
+    return qm.LOG_FILE, qm.ERR_PATH
+
+
+@functools.lru_cache(maxsize=None)
+def ico(name=None):
+    # Each PNG is read and decoded once per process; ico(None) is one shared empty icon.
+    if not name:
+        return QIcon()
+    return QIcon(ICON_PATHS.get(name) or _ICON_DIR_JOIN + name)
 
 
 class QgisMonitorProPlugin:
@@ -28,169 +56,268 @@ class QgisMonitorProPlugin:
         self.actions = []
         self.toolbar = None
         self._act_live = None
+        self._main_btn = None
+        self._tasks = []
+        self._log_dir_cached = None
+        self._log_dir_url_cache = None
+        self._mw = None
+        self._msg_bar = None
+        self._pid = QgsApplication.instance().applicationPid()
+        self._autostart = bool(get_setting("autostart", bool))
 
     def initGui(self):
+        self._mw = self.iface.mainWindow()
+        self._build_primary_actions()
+        # Minder gebruikte acties pas in de volgende event-loop tick, zodat QGIS eerder bruikbaar is
+        QTimer.singleShot(0, self._build_secondary_actions)
+
+        if self._autostart:
+            QTimer.singleShot(1000, self._auto_start)
+
+    def _add_to_menu(self, actions):
+        self.actions.extend(actions)
+        # Eén guard voor de hele batch: faalt er één, dan is het menu zelf weg (SIP object deleted)
+        try:
+            for a in actions:
+                self.iface.addPluginToMenu(self._menu_name, a)
+        except Exception:
+            pass
+
+    def _make_actions(self, specs):
+        # specs: (attribuutnaam, icoon, label, slot); de actie wordt ook als self.<naam> bewaard
+        made = []
+        for attr, icon_name, label, slot in specs:
+            act = QAction(ico(icon_name), label, self._mw)
+            act.triggered.connect(slot)
+            setattr(self, attr, act)
+            made.append(act)
+        return made
+
+    def _build_primary_actions(self):
         # Menu actions (met iconen)
-        self.action_settings = QAction(ico("icon_settings.png"), "Instellingen…", self.iface.mainWindow())
-        self.action_settings.triggered.connect(self._open_settings)
-        self.iface.addPluginToMenu(self._menu_name, self.action_settings)
-        self.actions.append(self.action_settings)
-
-        self.action_diag = QAction(ico("icon_diag.png"), "Diagnose uitvoeren → TXT", self.iface.mainWindow())
-        self.action_diag.triggered.connect(self._run_diag)
-        self.iface.addPluginToMenu(self._menu_name, self.action_diag)
-        self.actions.append(self.action_diag)
-
-        self.action_bundle = QAction(ico("icon_diag.png"), "Bundel logs → ZIP", self.iface.mainWindow())
-        self.action_bundle.triggered.connect(self._bundle_logs)
-        self.iface.addPluginToMenu(self._menu_name, self.action_bundle)
-        self.actions.append(self.action_bundle)
-
-        self.action_open = QAction(ico("icon_folder.png"), "Open logmap", self.iface.mainWindow())
-        self.action_open.triggered.connect(self._open_folder)
-        self.iface.addPluginToMenu(self._menu_name, self.action_open)
-        self.actions.append(self.action_open)
-
-        self.action_toggle = QAction(ico("icon_start.png"), "Start Monitor", self.iface.mainWindow())
+        menu_actions = self._make_actions((
+            ("action_settings", "icon_settings.png", "Instellingen…", self._open_settings),
+            ("action_toggle", "icon_start.png", "Start Monitor", self._toggle_monitor),
+        ))
         self.action_toggle.setCheckable(True)
-        self.action_toggle.triggered.connect(self._toggle_monitor)
-        self.iface.addPluginToMenu(self._menu_name, self.action_toggle)
-        self.actions.append(self.action_toggle)
 
         # Toolbar (slank): alleen hoofdicoon + start/stop
-        mw = self.iface.mainWindow()
-        existing = mw.findChild(QToolBar, "QGISMonitorProToolbar")
+        existing = self._mw.findChild(QToolBar, "QGISMonitorProToolbar")
         if existing:
             self.toolbar = existing
         else:
-            self.toolbar = self.iface.addToolBar("QGIS Monitor Pro")
+            self.toolbar = self.iface.addToolBar(_TITLE)
             self.toolbar.setObjectName("QGISMonitorProToolbar")
 
         try:
-            for act in list(self.toolbar.actions()):
-                self.toolbar.removeAction(act)
+            self.toolbar.clear()
         except Exception:
             pass
 
-        main_btn = QAction(QIcon(os.path.join(ICON_DIR, "icon.png")), "QGIS Monitor Pro — Instellingen", self.iface.mainWindow())
-        main_btn.triggered.connect(self._open_settings)
-        self.toolbar.addAction(main_btn)
-        self.toolbar.addAction(self.action_toggle)
+        self._main_btn = QAction(ico("icon.png"), "QGIS Monitor Pro — Instellingen", self._mw)
+        self._main_btn.triggered.connect(self._open_settings)
+        toolbar_actions = [self._main_btn, self.action_toggle]
 
         # Live Log Viewer action (additive)
         try:
-            self._act_live = QAction(QgsApplication.getThemeIcon("mActionOpenTable.svg"), "Live Log Viewer", self.iface.mainWindow())
+            self._act_live = QAction(QgsApplication.getThemeIcon("mActionOpenTable.svg"), "Live Log Viewer", self._mw)
             self._act_live.triggered.connect(self._open_live)
-            if self.toolbar:
-                self.toolbar.addAction(self._act_live)
-            try:
-                self.iface.addPluginToMenu(self._menu_name, self._act_live)
-                self.actions.append(self._act_live)
-            except Exception:
-                pass
+            toolbar_actions.append(self._act_live)
+            menu_actions.append(self._act_live)
         except Exception:
             self._act_live = None
 
-        # Testlogs (menu only)
-        self._act_test = QAction("Genereer testlogs", self.iface.mainWindow())
-        self._act_test.triggered.connect(self._emit_test)
-        self.iface.addPluginToMenu(self._menu_name, self._act_test)
-        self.actions.append(self._act_test)
+        # Alles in één keer toevoegen: één layout-pass voor de toolbar i.p.v. één per actie
+        self.toolbar.setUpdatesEnabled(False)
+        try:
+            self.toolbar.addActions(toolbar_actions)
+        finally:
+            self.toolbar.setUpdatesEnabled(True)
+        self._add_to_menu(menu_actions)
 
-        if bool(get_setting("autostart", bool)):
-            QTimer.singleShot(1000, self._auto_start)
+    def _build_secondary_actions(self):
+        if self._mw is None:  # al ge-unload voordat de timer afging
+            return
+        self._add_to_menu(self._make_actions((
+            ("action_diag", "icon_diag.png", "Diagnose uitvoeren → TXT", self._run_diag),
+            ("action_bundle", "icon_diag.png", "Bundel logs → ZIP", self._bundle_logs),
+            ("action_open", "icon_folder.png", "Open logmap", self._open_folder),
+            ("_act_test", None, "Genereer testlogs", self._emit_test),  # testlogs: alleen menu, geen icoon
+        )))
 
     def unload(self):
-        try:
-            qgismonitor_stop()
-        except Exception:
-            pass
+        qm = sys.modules.get(__package__ + ".qgis_monitor")
+        if qm is not None:  # nooit geladen = ook nooit gestart
+            try:
+                qm.qgismonitor_stop()
+            except Exception:
+                pass
+        if self._live_dock is not None:
+            try:
+                self._live_dock.shutdown()
+                self.iface.removeDockWidget(self._live_dock)
+                self._live_dock.deleteLater()  # anders blijft bij elke plugin-reload een dock (met QThread) achter
+            except Exception:
+                pass
+            self._live_dock = None
+        # Slots loskoppelen zodat er tijdens het afsluiten geen Python-callbacks meer lopen
+        for a in self.actions + [self._main_btn]:
+            try:
+                a.triggered.disconnect()
+            except (TypeError, RuntimeError, AttributeError):
+                pass
         for a in self.actions:
             try:
                 self.iface.removePluginMenu(self._menu_name, a)
             except Exception:
                 pass
         self.actions.clear()
+        self._main_btn = None
         if self.toolbar:
             try:
-                for act in list(self.toolbar.actions()):
-                    self.toolbar.removeAction(act)
+                self.toolbar.clear()
             except Exception:
                 pass
             self.toolbar = None
+        self._mw = None
+        self._msg_bar = None
+
+    # ---- messagebar helpers ----
+    @property
+    def _msgbar(self):
+        # Eén keer opgehaald; unload() wist de cache (hoofdvenster kan bij profielwissel vernieuwd worden)
+        if self._msg_bar is None:
+            self._msg_bar = self.iface.messageBar()
+        return self._msg_bar
+
+    def _notify_success(self, msg):
+        self._msgbar.pushSuccess(_TITLE, msg)
+
+    def _notify_info(self, msg):
+        self._msgbar.pushInfo(_TITLE, msg)
+
+    def _notify_warn(self, msg):
+        self._msgbar.pushWarning(_TITLE, msg)
 
     # ---- UI callbacks ----
     def _open_settings(self):
-        dlg = SettingsDialog(self.iface.mainWindow())
+        # Imported on first use so QGIS startup doesn't pay for the dialog module.
+        from .settings_ui import SettingsDialog
+        dlg = SettingsDialog(self._mw)
         if dlg.exec_():
-            dlg.apply()
-            QMessageBox.information(self.iface.mainWindow(), "QGIS Monitor Pro", "Instellingen opgeslagen.")
-            if self.action_toggle.isChecked():
-                qgismonitor_stop()
-                QTimer.singleShot(300, lambda: qgismonitor_start(self.iface))
+            changed = dlg.apply()
+            if changed:
+                self._log_dir_cached = self._log_dir_url_cache = None
+            QMessageBox.information(self._mw, _TITLE, "Instellingen opgeslagen.")
+            # Alleen herstarten als er echt iets gewijzigd is; pas na het sluiten van de
+            # melding, want information() draait een eigen event-loop
+            if changed and self.action_toggle.isChecked():
+                QTimer.singleShot(0, self._restart_monitor)
+
+    def _restart_monitor(self):
+        _qm().qgismonitor_stop()
+        _qm().qgismonitor_start(self.iface)
+
+    def _run_task(self, name, fn, done):
+        # Bestandswerk buiten de GUI-thread; done(exception, result) draait weer op de GUI-thread
+        def _finished(exception, result=None):
+            try:
+                self._tasks.remove(task)
+            except ValueError:
+                pass
+            done(exception, result)
+        task = QgsTask.fromFunction(name, lambda _task: fn(), on_finished=_finished)
+        self._tasks.append(task)  # referentie houden tot de task klaar is
+        QgsApplication.taskManager().addTask(task)
 
     def _run_diag(self):
-        p = write_diagnostics_txt()
-        if p.startswith("ERROR"):
-            QMessageBox.critical(self.iface.mainWindow(), "QGIS Monitor Pro", p)
-        else:
-            self.iface.messageBar().pushSuccess("QGIS Monitor Pro", f"Diagnose geschreven: {p}")
-            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(p)))
+        from .utils import write_diagnostics_txt
+        def _done(exc, p):
+            if exc is not None or not p or p.startswith("ERROR"):
+                QMessageBox.critical(self._mw, _TITLE, str(exc or p))
+            else:
+                self._notify_success(f"Diagnose geschreven: {p}")
+                QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(p)))
+        def _write():
+            _flush_engine()
+            return write_diagnostics_txt()
+        self._run_task("QGIS Monitor Pro: diagnose", _write, _done)
 
     def _bundle_logs(self):
-        try:
-            out = os.path.join(get_log_dir(), f"logs_bundle_{QgsApplication.instance().applicationPid()}.zip")
-            ok = make_diagnostics_zip(out)
-            if ok:
-                self.iface.messageBar().pushSuccess("QGIS Monitor Pro", f"Bundle geschreven: {out}")
+        make_diagnostics_zip = _qm().make_diagnostics_zip
+        out = os.path.join(self._log_dir(), f"logs_bundle_{self._pid}.zip")
+        def _done(exc, ok):
+            if exc is not None:
+                QMessageBox.critical(self._mw, _TITLE, str(exc))
+            elif ok:
+                self._notify_success(f"Bundle geschreven: {out}")
                 QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(out)))
             else:
-                QMessageBox.warning(self.iface.mainWindow(), "QGIS Monitor Pro", "Kon de bundel niet schrijven.")
-        except Exception as e:
-            QMessageBox.critical(self.iface.mainWindow(), "QGIS Monitor Pro", str(e))
+                QMessageBox.warning(self._mw, _TITLE, "Kon de bundel niet schrijven.")
+        self._run_task("QGIS Monitor Pro: logbundel", lambda: make_diagnostics_zip(out), _done)
+
+    def _log_dir(self):
+        # Pad één keer per instellingen-versie uit QSettings; de map opnieuw aanmaken als hij
+        # intussen verwijderd is (makedirs met exist_ok is dan goedkoop)
+        if self._log_dir_cached is None:
+            self._log_dir_cached = get_log_dir()
+        else:
+            try: os.makedirs(self._log_dir_cached, exist_ok=True)
+            except Exception: pass
+        return self._log_dir_cached
+
+    @property
+    def _log_dir_url(self):
+        # Pas opnieuw opgebouwd als de instellingen wijzigen (zie _open_settings); _log_dir()
+        # loopt wel elke keer zodat een intussen verwijderde map opnieuw wordt aangemaakt
+        path = self._log_dir()
+        if self._log_dir_url_cache is None:
+            self._log_dir_url_cache = QUrl.fromLocalFile(path)
+        return self._log_dir_url_cache
 
     def _open_folder(self):
-        d = get_log_dir()
-        QDesktopServices.openUrl(QUrl.fromLocalFile(d))
-        self.iface.messageBar().pushInfo("QGIS Monitor Pro", f"Logmap geopend: {d}")
+        url = self._log_dir_url
+        QDesktopServices.openUrl(url)
+        self._notify_info(f"Logmap geopend: {url.toLocalFile()}")
 
     def _toggle_monitor(self, checked):
         if checked:
             try:
-                qgismonitor_start(self.iface)
+                _qm().qgismonitor_start(self.iface)
                 self.action_toggle.setIcon(ico("icon_stop.png"))
                 self.action_toggle.setText("Stop Monitor")
-                self.iface.messageBar().pushSuccess("QGIS Monitor Pro", "Monitor gestart.")
+                self._notify_success("Monitor gestart.")
             except Exception as e:
                 self.action_toggle.setChecked(False)
-                QMessageBox.critical(self.iface.mainWindow(), "QGIS Monitor Pro", f"Kon de monitor niet starten:\n{e}")
+                QMessageBox.critical(self._mw, _TITLE, f"Kon de monitor niet starten:\n{e}")
         else:
-            qgismonitor_stop()
+            _qm().qgismonitor_stop()
             self.action_toggle.setIcon(ico("icon_start.png"))
             self.action_toggle.setText("Start Monitor")
-            self.iface.messageBar().pushSuccess("QGIS Monitor Pro", "Monitor gestopt.")
+            self._notify_success("Monitor gestopt.")
 
     def _auto_start(self):
         if self.action_toggle.isChecked():
             return
         try:
-            qgismonitor_start(self.iface)
+            _qm().qgismonitor_start(self.iface)
             self.action_toggle.setChecked(True)
             self.action_toggle.setIcon(ico("icon_stop.png"))
             self.action_toggle.setText("Stop Monitor")
-            self.iface.messageBar().pushInfo("QGIS Monitor Pro", "Autostart actief.")
+            self._notify_info("Autostart actief.")
         except Exception as e:
-            self.iface.messageBar().pushWarning("QGIS Monitor Pro", f"Autostart faalde: {e}")
+            self._notify_warn(f"Autostart faalde: {e}")
 
     def _open_live(self):
         try:
             if self._live_dock is None:
-                self._live_dock = LiveLogDock(self.iface.mainWindow(), get_paths=lambda: (LOG_FILE, ERR_PATH))
+                from .log_viewer import LiveLogDock
+                self._live_dock = LiveLogDock(self._mw, get_paths=_monitor_paths)
             self.iface.addDockWidget(Qt.RightDockWidgetArea, self._live_dock)
             self._live_dock.show()
             self._live_dock.raise_()
         except Exception as e:
-            self.iface.messageBar().pushWarning("QGIS Monitor Pro", f"Kon Live Log niet openen: {e}")
+            self._notify_warn(f"Kon Live Log niet openen: {e}")
 
     def _emit_test(self):
         try:
@@ -201,8 +328,7 @@ class QgisMonitorProPlugin:
             try:
                 raise RuntimeError('Test exception voor errors.log')
             except Exception as e:
-                import traceback
-                log.error('[Test] Exception: ' + ''.join(traceback.format_exception_only(type(e), e)).strip())
-            self.iface.messageBar().pushInfo('QGIS Monitor Pro', 'Testlogs geschreven (full/errors/json).')
+                log.error('[Test] Exception: %s', f'{type(e).__name__}: {e}')
+            self._notify_info('Testlogs geschreven (full/errors/json).')
         except Exception as e:
-            self.iface.messageBar().pushWarning('QGIS Monitor Pro', f'Testlog mislukt: {e}')
+            self._notify_warn(f'Testlog mislukt: {e}')
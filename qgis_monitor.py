@@ -3,16 +3,16 @@
 """
 QGIS Monitor Pro — engine (v3.3.7 clean)
 """
-import os, sys, time, json, traceback, logging, tempfile, uuid, re
+import io, os, sys, copy, time, json, traceback, logging, tempfile, re, itertools, threading, queue, functools
 from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler, MemoryHandler
-from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import OrderedDict, deque
 
 from qgis.core import Qgis, QgsApplication, QgsProject, QgsMapLayer, QgsMessageLog
 from qgis.PyQt.QtWidgets import QApplication
 from qgis.PyQt.QtCore import QSettings, QTimer
 
-from .utils import get_setting, set_setting, get_log_dir, bundle_logs_zip, post_webhook
+from .utils import get_setting, cached_setting, set_setting, get_log_dir, bundle_logs_zip, post_webhook
 
 MONITOR_TAG = "QGISMonitorPro"
 ORG = "QGISMonitorPro"
@@ -23,10 +23,11 @@ logger.setLevel(logging.DEBUG)
 logger.propagate = False
 
 _started = False
-fh = eh = qh = jh = memh = None
+fh = eh = qh = jh = None
 LOG_DIR = LOG_FILE = ERR_PATH = JSON_PATH = None
 session_id = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 _breadcrumbs = deque(maxlen=400)
+_DEBUG_ON = True  # gelijk aan logger.isEnabledFor(DEBUG); bijgewerkt in _install_handlers
 _heartbeat_timer = None
 
 try:
@@ -35,68 +36,189 @@ try:
 except Exception:
     psutil = None; _ps = None
 
+def _json_line_std(o) -> bytes:
+    return json.dumps(o, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+# orjson (optioneel) levert direct utf-8 bytes; terugvallen op json bij types die orjson weigert
+try:
+    import orjson
+    def _json_line(o) -> bytes:
+        try: return orjson.dumps(o, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError: return _json_line_std(o)
+except Exception:
+    orjson = None; _json_line = _json_line_std
+
 # ------------- helpers -------------
+def _write_atomic(path:str, text:str):
+    # Eerst naar .tmp, dan os.replace: lezers zien nooit een half geschreven bestand
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f: f.write(text)
+    os.replace(tmp, path)
+
+# Vaste sleutels van latest.txt, in schrijfvolgorde
+_LATEST_KEYS = ("FULL", "ERRORS", "JSON", "STARTED")
+
+# Kleine schrijfklussen (latest.txt) in een achtergrondthread, in volgorde van aanbieden
+_io_q = None
+_io_thread = None
+
+def _io_worker(q):
+    while True:
+        fn = q.get()
+        if fn is None: return
+        try: fn()
+        except Exception: pass
+
+def _io_submit(fn):
+    global _io_q, _io_thread
+    if _io_thread is None or not _io_thread.is_alive():
+        _io_q = queue.SimpleQueue()
+        _io_thread = threading.Thread(target=_io_worker, args=(_io_q,), name="QGISMonitorIO", daemon=True)
+        _io_thread.start()
+    _io_q.put(fn)
+
+def _io_stop():
+    global _io_thread
+    if _io_thread is None: return
+    _io_q.put(None)
+    try: _io_thread.join(timeout=1.0)
+    except Exception: pass
+    _io_thread = None
+
+@functools.lru_cache(maxsize=64)
 def _normpath(p:str) -> str:
     try: return os.path.normpath(os.path.abspath(p))
     except Exception: return p
 
-def _sample_label(prefix=""):
-    if not _ps: return prefix.strip()
+# psutil leest /proc per aanroep; de label-tekst wordt hooguit eens per seconde ververst
+_SAMPLE_CACHE = {"ts": 0.0, "s": ""}
+
+def _refresh_sample_label():
     try:
         mem = _ps.memory_info().rss / (1024 * 1024)
         cpu = int(_ps.cpu_percent(interval=None))
-        return f"{prefix}RAM={mem:.1f}MB CPU≈{cpu}%".strip()
+        _SAMPLE_CACHE["s"] = f"RAM={mem:.1f}MB CPU≈{cpu}%"
     except Exception:
-        return prefix.strip()
+        _SAMPLE_CACHE["s"] = ""
+    _SAMPLE_CACHE["ts"] = time.monotonic()
+    return _SAMPLE_CACHE["s"]
+
+def _sample_label(prefix=""):
+    if not _ps: return prefix.strip()
+    s = _SAMPLE_CACHE["s"] if time.monotonic() - _SAMPLE_CACHE["ts"] < 1.0 else _refresh_sample_label()
+    return f"{prefix}{s}".strip()
+
+class _SharedFormatter(logging.Formatter):
+    # Alle handlers gebruiken hetzelfde formaat: één format() per record, de rest leest de cache
+    def format(self, record):
+        try: return record._qgm_text
+        except AttributeError: pass
+        text = record._qgm_text = super().format(record)
+        return text
+
+def _record_msg(record):
+    # getMessage() één keer per record, gedeeld door filters en handlers
+    try: return record._qgm_msg
+    except AttributeError: pass
+    msg = record._qgm_msg = record.getMessage()
+    return msg
 
 def _fmt():
     df = get_setting("date_format", str) or "%Y-%m-%d %H:%M:%S"
-    return logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt=df)
+    return _SharedFormatter("%(asctime)s [%(levelname)s] %(message)s", datefmt=df)
 
 def _level():
     lvl = get_setting("level", str) or "DEBUG"
     return getattr(logging, lvl.upper(), logging.DEBUG)
 
+# Correlatie-id's hoeven alleen binnen de sessie uniek te zijn: een teller volstaat
+_corr_counter = itertools.count(1)
+
+def _corr():
+    return f"{next(_corr_counter):08x}"
+
 def crumb(evt:str):
-    try: _breadcrumbs.append(f"{datetime.now(timezone.utc).isoformat()} {evt}")
+    # (time_ns, evt); pas bij een foutdump omgezet naar ISO-tijd
+    try: _breadcrumbs.append((time.time_ns(), evt))
     except Exception: pass
 
-_SCRUB = [
-    (re.compile(r"C:\\\\Users\\[^\\]+", re.I), r"C:\\Users\\<redacted>"),
-    (re.compile(r"/home/[^/]+", re.I), r"/home/<redacted>"),
-    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b"), "<ip>"),
-]
+def _crumb_lines(n=100):
+    size = len(_breadcrumbs)
+    try: items = tuple(itertools.islice(_breadcrumbs, max(0, size - n), size))
+    except RuntimeError: items = list(_breadcrumbs)[-n:]  # deque gewijzigd tijdens het lezen (andere thread)
+    return "\n".join(f"{datetime.fromtimestamp(ns / 1e9, timezone.utc).isoformat()} {evt}" for ns, evt in items)
+
+# Eén pass over de tekst; de groepnaam bepaalt de vervanging
+_SCRUB_RE = re.compile(
+    r"(?P<winuser>C:\\Users\\[^\\]+)"
+    r"|(?P<linuser>/home/[^/]+)"
+    r"|(?P<ip>\b\d{1,3}(?:\.\d{1,3}){3}\b)",
+    re.I,
+)
+_SCRUB_REPL = {"winuser": "C:\\Users\\<redacted>", "linuser": "/home/<redacted>", "ip": "<ip>"}
+
+def _scrub_dispatch(m):
+    return _SCRUB_REPL[m.lastgroup]
+
 def _scrub(text: str) -> str:
-    if not get_setting("scrub_enabled", bool): return text
-    try:
-        for rx, rep in _SCRUB: text = rx.sub(rep, text)
-    except Exception: pass
-    return text
+    if not cached_setting("scrub_enabled", bool): return text
+    try: return _SCRUB_RE.sub(_scrub_dispatch, text)
+    except Exception: return text
 
 class QGISLogHandler(logging.Handler):
-    MAP = {logging.ERROR: Qgis.Critical, logging.WARNING: Qgis.Warning, logging.INFO: Qgis.Info, logging.DEBUG: Qgis.Info}
+    """Stuurt records naar het QGIS-logpaneel, gebundeld per listener-pass.
+
+    emit() verzamelt alleen; flush() (door de listener aangeroepen zodra de queue leeg is,
+    bij de flush-markering en bij stoppen) geeft per niveau één logMessage met één regel per
+    record. Zo kost een burst één signaal/repaint per niveau i.p.v. één per record.
+    Alles draait in de listener-thread, dus zonder lock.
+    """
+    MAP = {logging.CRITICAL: Qgis.Critical, logging.ERROR: Qgis.Critical, logging.WARNING: Qgis.Warning, logging.INFO: Qgis.Info, logging.DEBUG: Qgis.Info}
+    MAX_BATCH = 500
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self._pending = {}; self._count = 0  # Qgis-niveau -> [regels]
+
     def emit(self, record):
         try:
-            msg = _scrub(record.getMessage())
-            QgsMessageLog.logMessage(str(msg), MONITOR_TAG, self.MAP.get(record.levelno, Qgis.Info))
+            lvl = self.MAP.get(record.levelno, Qgis.Info)
+            self._pending.setdefault(lvl, []).append(str(_scrub(_record_msg(record))))
+            self._count += 1
+            if self._count >= self.MAX_BATCH: self.flush()
         except Exception:
             pass
 
+    def flush(self):
+        if not self._count: return
+        pending, self._pending, self._count = self._pending, {}, 0
+        for lvl, lines in pending.items():
+            try: QgsMessageLog.logMessage("\n".join(lines), MONITOR_TAG, lvl)
+            except Exception: pass
+
+    def close(self):
+        self.flush()
+        super().close()
+
 class JsonWriter:
+    # Gebufferd (64 KB) zonder fsync per regel; flush() via de coalesce-timer, force_flush() en close()
+    BUFSIZE = 65536
     def __init__(self, path):
         self.path = path; self.f = None
         try:
             os.makedirs(os.path.dirname(path), exist_ok=True)
-            self.f = open(path, "a", encoding="utf-8", buffering=1)
+            self.f = io.BufferedWriter(open(path, "ab", buffering=0), buffer_size=self.BUFSIZE)
         except Exception as e:
             QgsMessageLog.logMessage(f"{MONITOR_TAG} JSONL open fail: {e}", MONITOR_TAG, Qgis.Warning); self.f = None
     def write(self, msg:dict):
         if not self.f: return
         try:
-            self.f.write(json.dumps(msg, ensure_ascii=False) + "\n")
-            self.f.flush()
-            try: os.fsync(self.f.fileno())
-            except Exception: pass
+            self.f.write(_json_line(msg))
+            if msg.get("level") in ("ERROR", "CRITICAL"): self.f.flush()  # fouten direct op schijf
+        except Exception: pass
+    def flush(self):
+        try:
+            if self.f: self.f.flush()
         except Exception: pass
     def close(self):
         try:
@@ -104,6 +226,8 @@ class JsonWriter:
         except Exception: pass
 
 # ---- Noise reduction ----
+# key -> [aantal onderdrukt, start van het venster]; alleen de listener-thread leest/schrijft (filter en
+# _flush_coalesce_summary via _FLUSH_MARK), dus geen lock nodig
 _COALESCE = {}
 _COALESCE_TIMER = None
 _NOISE_PATTERNS = [
@@ -113,59 +237,61 @@ _NOISE_PATTERNS = [
     "Cannot open file ':/images/themes/default/",
     "libpng warning:",
 ]
+_NOISE_RE = re.compile("|".join(re.escape(p) for p in _NOISE_PATTERNS))
+
+_URL_QUERY_RE = re.compile(r"(\?|&).*")
 
 def _coalesce_key(record: logging.LogRecord):
-    msg = record.getMessage()
-    if "http" in msg: msg = re.sub(r"(\?|&).*", "", msg)
+    msg = _record_msg(record)
+    if "http" in msg: msg = _URL_QUERY_RE.sub("", msg)
     return (record.levelno, msg[:512])
 
 class CoalesceFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        if not get_setting("coalesce_enabled", bool):
+        if not cached_setting("coalesce_enabled", bool):
             return True
-        win = float(get_setting("coalesce_window_sec", float) or 3.0)
-        now = time.time()
+        win = float(cached_setting("coalesce_window_sec", float) or 3.0)
+        now = time.monotonic()
         key = _coalesce_key(record)
-        cnt, last = _COALESCE.get(key, (0, 0.0))
-        if now - last <= win:
-            _COALESCE[key] = (cnt+1, last)
+        c = _COALESCE.get(key)
+        if c is not None and now - c[1] <= win:
+            c[0] += 1
             return False
-        else:
-            if cnt > 0:
-                logger.log(logging.INFO, "[coalesce] vorige melding %dx herhaald: %s", cnt, key[1])
-            _COALESCE[key] = (0, now)
-            return True
+        if c is not None and c[0] > 0:
+            logger.log(logging.INFO, "[coalesce] vorige melding %dx herhaald: %s", c[0], key[1])
+        _COALESCE[key] = [0, now]
+        return True
 
 def _flush_coalesce_summary():
     if not _COALESCE: return
     items = list(_COALESCE.items()); _COALESCE.clear()
+    mux = _mux
     for (lvl, msg), (cnt, last) in items:
-        if cnt > 0:
-            logger.log(logging.INFO, "[coalesce] melding %dx herhaald: %s", cnt, msg)
+        if cnt > 0 and mux is not None:
+            # Draait in de listener-thread: direct naar de mux, niet achter een eventuele stop-sentinel
+            mux.handle(logger.makeRecord(logger.name, logging.INFO, __file__, 0, "[coalesce] melding %dx herhaald: %s", (cnt, msg), None))
 
 class QtNoiseFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        if not get_setting("mute_qt_noise", bool):
+        if not cached_setting("mute_qt_noise", bool):
             return True
         if record.levelno < logging.WARNING:
             return True
-        msg = record.getMessage()
-        for pat in _NOISE_PATTERNS:
-            if pat in msg:
-                return False
-        return True
+        return _NOISE_RE.search(_record_msg(record)) is None
 
 # ------------- setup logger -------------
+@functools.lru_cache(maxsize=64)
+def _sanitize_project_name(name:str) -> str:
+    return "_" + "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in name)[:40]
+
 def _project_suffix():
-    try:
-        name = QgsProject.instance().baseName() or "no_project"
-        return "_" + "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in name)[:40]
-    except Exception:
-        return "_no_project"
+    try: return _sanitize_project_name(QgsProject.instance().baseName() or "no_project")
+    except Exception: return "_no_project"
 
 def _setup_paths():
     global LOG_DIR, LOG_FILE, ERR_PATH, JSON_PATH
-    LOG_DIR = _normpath(get_log_dir()); os.makedirs(LOG_DIR, exist_ok=True)
+    LOG_DIR = _normpath(get_log_dir())
+    if not os.path.isdir(LOG_DIR): os.makedirs(LOG_DIR, exist_ok=True)
     suffix = _project_suffix()
     app = QgsApplication.instance()
     reuse = bool(get_setting("single_file_session", bool))
@@ -179,15 +305,52 @@ def _setup_paths():
         JSON_PATH = _normpath(os.path.join(LOG_DIR, f"qgis_full_{ts}{suffix}.jsonl")) if get_setting("json_parallel", bool) else None
         if reuse: app.setProperty("qgismonitor_paths", {"LOG_FILE": LOG_FILE, "ERR_PATH": ERR_PATH, "JSON_PATH": JSON_PATH})
     try:
-        with open(os.path.join(LOG_DIR, "latest.txt"), "w", encoding="utf-8") as mf:
-            mf.write(f"FULL={LOG_FILE}\nERRORS={ERR_PATH}\nJSON={JSON_PATH or ''}\nSTARTED={datetime.now(timezone.utc).isoformat()}\n")
+        _io_submit(functools.partial(_write_atomic, os.path.join(LOG_DIR, "latest.txt"),
+                   f"FULL={LOG_FILE}\nERRORS={ERR_PATH}\nJSON={JSON_PATH or ''}\nSTARTED={datetime.now(timezone.utc).isoformat()}\n"))
     except Exception:
         pass
 
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler met 64 KB schrijfbuffer en een gesamplede rollover-check.
+
+    De stdlib flusht na elk record en stat/seekt het bestand per emit; hier gebeurt de
+    rollover-check hooguit elke CHECK_EVERY records of CHECK_SEC seconden, en wordt alleen
+    bij ERROR en hoger direct geflusht. De rest gaat via force_flush()/_flush_buffers().
+    """
+    BUFSIZE = 65536
+    CHECK_EVERY = 256
+    CHECK_SEC = 5.0
+
+    def __init__(self, *args, **kwargs):
+        self._emit_count = 0; self._last_check = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.BUFSIZE, encoding=self.encoding, errors=self.errors)
+
+    def shouldRollover(self, record):
+        self._emit_count += 1
+        now = time.monotonic()
+        if self._emit_count < self.CHECK_EVERY and now - self._last_check < self.CHECK_SEC:
+            return False
+        self._emit_count = 0; self._last_check = now
+        return super().shouldRollover(record)
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record): self.doRollover()
+            if self.stream is None: self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR: self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
 def _open_rotating(path, level):
     fmt = _fmt()
     try:
-        h = RotatingFileHandler(path, mode="a", encoding="utf-8",
+        h = BufferedRotatingFileHandler(path, mode="a", encoding="utf-8",
                                 maxBytes=int(get_setting("max_log_mb", int))*1024*1024,
                                 backupCount=int(get_setting("rot_backups", int)))
         h.setLevel(level); h.setFormatter(fmt); return h
@@ -202,50 +365,200 @@ def _open_rotating(path, level):
             QgsMessageLog.logMessage(f"{MONITOR_TAG}: file handler fail -> {e2}", MONITOR_TAG, Qgis.Critical)
             return None
 
+class MuxHandler(logging.Handler):
+    """Eén handler op de logger: filters (coalesce, Qt-ruis) en format draaien één keer per
+    record, daarna gaat het record naar elke sink boven diens minimumniveau.
+
+    Een sink is (niveau, write(record), owner); owner wordt mee geflusht en gesloten.
+    """
+    def __init__(self):
+        super().__init__(logging.NOTSET)
+        self._sinks = []
+
+    def add_sink(self, write, level=logging.NOTSET, owner=None):
+        self._sinks.append((level, write, owner))
+
+    def emit(self, record):
+        for level, write, _owner in self._sinks:
+            if record.levelno >= level:
+                try: write(record)
+                except Exception: pass
+
+    def flush(self):
+        for _level, _write, owner in self._sinks:
+            try:
+                if owner is not None: owner.flush()
+            except Exception: pass
+
+    def close(self):
+        for _level, _write, owner in self._sinks:
+            try:
+                if owner is not None: owner.close()
+            except Exception: pass
+        self._sinks = []
+        super().close()
+
+_UTC = timezone.utc
+_ISO_SEC = [None, ""]  # [hele seconde, "YYYY-mm-ddTHH:MM:SS"]; alleen de listener-thread schrijft
+
+def _iso_utc(ts:float) -> str:
+    # Datum/tijd-deel hooguit eens per seconde opbouwen; daarna alleen de microseconden
+    sec = int(ts)
+    if sec != _ISO_SEC[0]:
+        _ISO_SEC[1] = datetime.fromtimestamp(sec, _UTC).strftime("%Y-%m-%dT%H:%M:%S"); _ISO_SEC[0] = sec
+    return f"{_ISO_SEC[1]}.{min(999999, round((ts - sec) * 1e6)):06d}+00:00"
+
+def _json_sink(record):
+    if jh: jh.write({"ts": _iso_utc(record.created), "level": record.levelname, "msg": _record_msg(record)})
+
+_EXC_FMT = logging.Formatter()
+
+class _DropOldestQueueHandler(QueueHandler):
+    # Aanroeper (vaak de Qt-thread) doet alleen een enqueue; bij een volle queue valt het oudste record af
+    dropped = 0
+    def prepare(self, record):
+        # Zoals de stdlib: bericht en traceback hier één keer renderen en een kopie zonder args/exc_info
+        # doorgeven (geen frames/objecten naar een andere thread). exc_text laat de Formatter in de
+        # listener de traceback toch nog achter de regel zetten; _qgm_msg gaat mee met de kopie.
+        msg = _record_msg(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXC_FMT.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.msg = msg; record.args = None; record.exc_info = None
+        return record
+    def enqueue(self, record):
+        try: self.queue.put_nowait(record); return
+        except queue.Full: pass
+        try: self.queue.get_nowait(); self.queue.task_done()
+        except (queue.Empty, ValueError): pass
+        self.dropped += 1
+        try: self.queue.put_nowait(record)
+        except queue.Full: pass
+
+class _FlushMark:
+    # In de queue gezet; de listener flusht dan zelf, tussen twee emits in. done (Event) wordt
+    # daarna gezet, zodat sync_flush() weet dat alles van vóór de markering op schijf staat.
+    __slots__ = ("done",)
+    def __init__(self, done=None): self.done = done
+
+_FLUSH_MARK = _FlushMark()  # periodiek, vanaf de GUI-timer; niemand wacht erop
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # blokkerend: ook bij een volle queue netjes stoppen
+    def handle(self, record):
+        if isinstance(record, _FlushMark):
+            try: _flush_in_listener()
+            finally:
+                if record.done is not None: record.done.set()
+            return
+        super().handle(record)
+        # Queue leeggelezen: de gebundelde QGIS-paneelregels van deze pass versturen
+        if qh is not None and self.queue.empty(): qh.flush()
+
+_QUEUE_MAX = 10000
+_log_queue = None
+_queue_handler = None
+_listener = None
+_mux = None
+
+def _stop_listener():
+    # Laat de listener de queue leegschrijven en sluit daarna de sinks
+    global _listener, _mux, _queue_handler
+    if _listener is not None:
+        try: _listener.stop()
+        except Exception: pass
+        _listener = None
+    if _mux is not None:
+        try: _mux.close()
+        except Exception: pass
+        _mux = None
+    _queue_handler = None
+
+def _report_dropped():
+    h = _queue_handler
+    if h is not None and h.dropped:
+        n = h.dropped; h.dropped = 0
+        logger.warning("[queue] %d logrecords verworpen (queue vol)", n)
+
 def _install_handlers():
-    global fh, eh, qh, jh, memh
+    global fh, eh, qh, jh, _log_queue, _queue_handler, _listener, _mux, _DEBUG_ON
+    _stop_listener()
     for h in list(logger.handlers):
         try: logger.removeHandler(h); h.close()
         except Exception: pass
 
     lvl = _level()
+    # Logger zelf op het ingestelde niveau: onder dat niveau wordt er geen LogRecord meer gebouwd
+    logger.setLevel(lvl)
+    _DEBUG_ON = logger.isEnabledFor(logging.DEBUG)
     fh = _open_rotating(LOG_FILE, lvl)
     eh = _open_rotating(ERR_PATH, logging.ERROR)
-    class _ErrOnly(logging.Filter):
-        def filter(self, rec): return rec.levelno >= logging.ERROR
-    if eh: eh.addFilter(_ErrOnly())
-
-    memh = MemoryHandler(256, flushLevel=logging.INFO, target=fh)
-    memh.setLevel(lvl); memh.setFormatter(_fmt())
-    # filters
-    try:
-        memh.addFilter(CoalesceFilter()); memh.addFilter(QtNoiseFilter())
-    except Exception: pass
-    logger.addHandler(memh)
-
-    if eh:
-        try: eh.addFilter(CoalesceFilter()); eh.addFilter(QtNoiseFilter())
-        except Exception: pass
-        logger.addHandler(eh)
-
     qh = QGISLogHandler(); qh.setLevel(logging.DEBUG); qh.setFormatter(_fmt())
-    try: qh.addFilter(QtNoiseFilter())
-    except Exception: pass
-    logger.addHandler(qh)
-
     if JSON_PATH:
-        try: globals()['jh'] = JsonWriter(JSON_PATH)
-        except Exception: globals()['jh'] = None
+        try: jh = JsonWriter(JSON_PATH)
+        except Exception: jh = None
     else:
-        globals()['jh'] = None
+        jh = None
+
+    mux = MuxHandler(); mux.setFormatter(_fmt())
+    try:
+        # Eerst de Qt-ruis weg, zodat gedempte regels niet als coalesce-samenvatting terugkomen
+        mux.addFilter(QtNoiseFilter()); mux.addFilter(CoalesceFilter())
+    except Exception: pass
+    if fh: mux.add_sink(fh.handle, lvl, fh)
+    if eh: mux.add_sink(eh.handle, logging.ERROR, eh)
+    mux.add_sink(qh.emit, owner=qh)
+    if jh: mux.add_sink(_json_sink)
+
+    # Schrijven naar schijf/QGIS gebeurt in de listener-thread; de logger zelf enqueuet alleen
+    _mux = mux
+    _log_queue = queue.Queue(_QUEUE_MAX)
+    _queue_handler = _DropOldestQueueHandler(_log_queue)
+    _listener = _Listener(_log_queue, mux)
+    _listener.start()
+    logger.addHandler(_queue_handler)
 
 def force_flush():
-    for h in list(logger.handlers):
-        try: h.flush()
-        except Exception: pass
+    # Bij afsluiten: listener.stop() schrijft de queue leeg (incl. de flush-markering) en joint de thread;
+    # daarna sluiten de sinks. De QueueHandler blijft hangen (begrensd, oudste valt af), zodat late
+    # records nergens anders heen lekken.
+    _flush_buffers()
+    _stop_listener()
+    if jh: jh.flush()
+
+def _flush_buffers():
+    # Periodiek (coalesce-timer, GUI-thread): alleen een markering enqueuen; de sinks zijn van de listener
+    _report_dropped()
+    q = _log_queue
+    if q is not None and _listener is not None:
+        try: q.put_nowait(_FLUSH_MARK)
+        except queue.Full: pass
+
+def sync_flush(timeout=2.0):
+    """Alles wat al gelogd is naar schijf, vóór een bestand gelezen wordt (bundel, diagnose).
+
+    Wacht tot de listener een eigen flush-markering verwerkt heeft; niet vanuit de listener zelf aanroepen.
+    """
+    q, listener = _log_queue, _listener
+    if q is None or listener is None:
+        # Geen listener (gestopt, of alleen de bootstrap-writer): de JSONL-writer kan nog open staan
+        if jh: jh.flush()
+        return True
+    done = threading.Event()
+    try: q.put(_FlushMark(done), timeout=timeout)
+    except queue.Full: return False
+    return done.wait(timeout)
+
+def _flush_in_listener():
+    # Listener-thread: coalesce-samenvatting, daarna full-log en JSONL naar schijf (o.a. voor de live viewer
+    # en, via sync_flush, vóór een bundel: de .jsonl in de zip is dan net zo actueel als de full-log)
+    _flush_coalesce_summary()
     try:
-        if hasattr(memh, "flush"): memh.flush()
+        if qh: qh.flush()
+        if fh: fh.flush()
     except Exception: pass
+    if jh: jh.flush()
 
 def _write_healthcheck():
     logger.info("===== %s gestart @ %s =====", MONITOR_TAG, datetime.now(timezone.utc).isoformat())
@@ -265,53 +578,60 @@ def _install_processing_hooks():
     _orig_runLoad = getattr(_p, "runAndLoadResults", None)
     debug_depth = int(get_setting("debug_depth", int))
 
-    def _safe(o):
-        try: json.dumps(o); return o
-        except Exception:
+    # debug_depth == 0: geen parameter-dump, dus ook geen _safe/_pp in het run-pad
+    _log_params = None
+    if debug_depth > 0:
+        def _safe(o):
             try:
+                if o is None or isinstance(o, (str, int, float, bool)): return o
                 if isinstance(o, dict): return {str(k): _safe(v) for k,v in o.items()}
                 if isinstance(o, (list, tuple)): return [_safe(v) for v in o]
                 return repr(o)
             except Exception: return "<unserializable>"
 
-    def _pp(p):
-        try: return json.dumps(_safe(p), ensure_ascii=False, indent=2)
-        except Exception: return repr(p)
+        def _pp(p):
+            # Meestal direct serialiseerbaar; alleen bij een fout de boom omzetten
+            try: return json.dumps(p, ensure_ascii=False, indent=2)
+            except (TypeError, ValueError): pass
+            try: return json.dumps(_safe(p), ensure_ascii=False, indent=2)
+            except Exception: return repr(p)
+
+        def _log_params(alg, corr, parameters):
+            if parameters is not None and _DEBUG_ON:
+                logger.debug("[Processing] params %s (corr=%s):\n%s", alg, corr, _pp(parameters))
 
     def run(alg, parameters=None, *a, **kw):
-        corr = uuid.uuid4().hex[:12]
-        t0 = time.time(); crumb(f"processing:start {alg} {corr}")
+        corr = _corr()
+        t0 = time.monotonic(); crumb(f"processing:start {alg} {corr}")
         try:
             logger.info("[Processing] START %s corr=%s %s", alg, corr, _sample_label(" | "))
-            if debug_depth > 0 and parameters is not None:
-                logger.debug("[Processing] params %s (corr=%s):\n%s", alg, corr, _pp(parameters))
+            if _log_params is not None: _log_params(alg, corr, parameters)
             res = _orig_run(alg, parameters, *a, **kw)
-            dt = time.time() - t0
-            keys = list(res.keys()) if hasattr(res, "keys") else "?"
+            dt = time.monotonic() - t0
+            keys = list(res) if isinstance(res, dict) else "?"
             logger.info("[Processing] DONE  %s corr=%s in %.3fs | keys=%s %s", alg, corr, dt, keys, _sample_label("| "))
             return res
         except Exception:
-            dt = time.time() - t0
-            tail = "\n".join(list(_breadcrumbs)[-100:])
+            dt = time.monotonic() - t0
+            tail = _crumb_lines(100)
             logger.error("[Processing] FAIL %s corr=%s na %.3fs %s\n-- breadcrumbs --\n%s\n%s", alg, corr, dt, _sample_label("| "), tail, traceback.format_exc())
             _notify_webhook("processing_fail", {"alg": str(alg), "corr": corr, "dt": dt})
             raise
 
     def runLoad(alg, parameters=None, *a, **kw):
         if _orig_runLoad is None: return run(alg, parameters, *a, **kw)
-        corr = uuid.uuid4().hex[:12]
-        t0 = time.time(); crumb(f"processing:start(load) {alg} {corr}")
+        corr = _corr()
+        t0 = time.monotonic(); crumb(f"processing:start(load) {alg} {corr}")
         try:
             logger.info("[Processing] START(load) %s corr=%s %s", alg, corr, _sample_label(" | "))
-            if debug_depth > 0 and parameters is not None:
-                logger.debug("[Processing] params %s (corr=%s):\n%s", alg, corr, _pp(parameters))
+            if _log_params is not None: _log_params(alg, corr, parameters)
             res = _orig_runLoad(alg, parameters, *a, **kw)
-            dt = time.time() - t0
+            dt = time.monotonic() - t0
             logger.info("[Processing] DONE (load) %s corr=%s in %.3fs %s", alg, corr, dt, _sample_label("| "))
             return res
         except Exception:
-            dt = time.time() - t0
-            tail = "\n".join(list(_breadcrumbs)[-100:])
+            dt = time.monotonic() - t0
+            tail = _crumb_lines(100)
             logger.error("[Processing] FAIL(load) %s corr=%s na %.3fs %s\n-- breadcrumbs --\n%s\n%s", alg, corr, dt, _sample_label("| "), tail, traceback.format_exc())
             _notify_webhook("processing_fail", {"alg": str(alg), "corr": corr, "dt": dt})
             raise
@@ -336,22 +656,25 @@ def _connect_canvas(iface):
         except Exception: pass
 
     def _rs():
-        try: c._t0 = time.time()
+        try: c._t0 = time.monotonic()
         except Exception: pass
-        crumb("canvas:render-start"); logger.debug("[Canvas] render start %s", _sample_label(" | "))
+        crumb("canvas:render-start")
+        if _DEBUG_ON: logger.debug("[Canvas] render start %s", _sample_label(" | "))
 
     def _rc(_img=None):
-        t0 = getattr(c, "_t0", None); dt = (time.time() - t0) if t0 else 0.0
+        t0 = getattr(c, "_t0", None); dt = (time.monotonic() - t0) if t0 else 0.0
         crumb(f"canvas:render-done {dt:.3f}s"); logger.info("[Canvas] render done in %.3fs %s", dt, _sample_label("| "))
 
     def _ext():
-        crumb("canvas:extentsChanged"); logger.debug("[Canvas] extentsChanged %s", _sample_label(" | "))
+        crumb("canvas:extentsChanged")
+        if _DEBUG_ON: logger.debug("[Canvas] extentsChanged %s", _sample_label(" | "))
 
     def _scale(s):
         crumb(f"canvas:scaleChanged {s}"); logger.info("[Canvas] scaleChanged → %.2f", s)
 
     def _ref():
-        crumb("canvas:refreshed"); logger.debug("[Canvas] refreshed %s", _sample_label(" | "))
+        crumb("canvas:refreshed")
+        if _DEBUG_ON: logger.debug("[Canvas] refreshed %s", _sample_label(" | "))
 
     c._qgm_rs = _rs; c._qgm_rc = _rc; c._qgm_ext = _ext; c._qgm_scale = _scale; c._qgm_ref = _ref
     try: c.renderStarting.connect(c._qgm_rs)
@@ -482,6 +805,10 @@ def _notify_webhook(event_type, extra=None):
     except Exception:
         pass
 
+def _heartbeat_tick():
+    if _ps: _refresh_sample_label()
+    logger.info("[HB] %s", _sample_label())
+
 def start_heartbeat():
     global _heartbeat_timer
     sec = int(get_setting("heartbeat_sec", int) or 0)
@@ -489,7 +816,7 @@ def start_heartbeat():
     if _heartbeat_timer is None:
         _heartbeat_timer = QTimer()
         _heartbeat_timer.setInterval(sec*1000)
-        _heartbeat_timer.timeout.connect(lambda: logger.info("[HB] %s", _sample_label()))
+        _heartbeat_timer.timeout.connect(_heartbeat_tick)
         _heartbeat_timer.start()
 
 def stop_heartbeat():
@@ -505,19 +832,36 @@ def _log_project_summary():
     except Exception:
         pass
 
+def _tail_bytes(path, n, block=65536):
+    # tail -n: in blokken terug-seeken tot er genoeg regels zijn; alleen dat stuk komt in geheugen
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        chunks = []; nl = 0
+        while pos > 0 and nl <= n:
+            step = min(block, pos); pos -= step
+            f.seek(pos); chunk = f.read(step)
+            chunks.append(chunk); nl += chunk.count(b"\n")
+    return b"".join(b"".join(reversed(chunks)).splitlines(keepends=True)[-n:])
+
 def make_diagnostics_zip(out_path):
-    files = []
-    for p in [LOG_FILE, ERR_PATH, JSON_PATH, os.path.join(LOG_DIR,"latest.txt")]:
-        if p and os.path.exists(p): files.append(p)
+    sync_flush()  # gebufferde full-log (64 KB / coalesce-venster) eerst naar schijf
+    # Eén directory-read voor alle bestaanscontroles i.p.v. een stat per kandidaat
+    try:
+        with os.scandir(LOG_DIR) as it: present = {e.name for e in it}
+    except Exception:
+        present = None
+    def _exists(p):
+        if present is not None and os.path.dirname(p) == LOG_DIR: return os.path.basename(p) in present
+        return os.path.exists(p)
+    files = [p for p in [LOG_FILE, ERR_PATH, JSON_PATH, os.path.join(LOG_DIR,"latest.txt")] if p and _exists(p)]
     tail = None
     try:
-        if LOG_FILE and os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()[- int(get_setting("tail_lines", int) or 300):]
+        if LOG_FILE and LOG_FILE in files:
+            text = _tail_bytes(LOG_FILE, int(get_setting("tail_lines", int) or 300)).decode("utf-8", "ignore")
             snap_dir = os.path.join(LOG_DIR, "crash_snapshots"); os.makedirs(snap_dir, exist_ok=True)
             ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
             tail = os.path.join(snap_dir, f"log_tail_{ts}.log")
-            with open(tail, "w", encoding="utf-8") as g: g.write("".join(lines))
+            with open(tail, "w", encoding="utf-8", newline="") as g: g.write(text)
     except Exception:
         pass
     extra = {"env.txt": "QGIS: " + getattr(Qgis, "QGIS_VERSION", "?")}
@@ -560,7 +904,7 @@ def qgismonitor_start(iface=None):
             _COALESCE_TIMER = QTimer()
             win = max(2.0, float(get_setting("coalesce_window_sec", float) or 3.0))
             _COALESCE_TIMER.setInterval(int(win*1000))
-            _COALESCE_TIMER.timeout.connect(_flush_coalesce_summary)
+            _COALESCE_TIMER.timeout.connect(_flush_buffers)
             _COALESCE_TIMER.start()
     except Exception:
         pass
@@ -570,21 +914,15 @@ def qgismonitor_start(iface=None):
     QgsMessageLog.logMessage(f"{MONITOR_TAG} actief.", MONITOR_TAG, Qgis.Info)
     _started = True; app.setProperty("qgismonitor_started", True)
 
-def _on_qgis_message(message, tag, level):
-    if tag == MONITOR_TAG: return
-    py = {Qgis.Critical: logging.ERROR, Qgis.Warning: logging.WARNING, Qgis.Info: logging.INFO, Qgis.Success: logging.INFO}.get(level, logging.DEBUG)
-    try: logger.log(py, f"[{tag}] {_scrub(message)}")
-    except Exception: pass
-
 def qgismonitor_stop():
     global _started, jh, _COALESCE_TIMER
     if not _started: return
-    try: QgsApplication.messageLog().messageReceived.disconnect(_on_qgis_message)
-    except Exception: pass
     stop_heartbeat()
     try:
         if _COALESCE_TIMER: _COALESCE_TIMER.stop(); _COALESCE_TIMER = None
     except Exception: pass
+    _stop_listener()
+    _io_stop()
     for h in list(logger.handlers):
         try: logger.removeHandler(h); h.close()
         except Exception: pass
@@ -600,8 +938,7 @@ def qgismonitor_stop():
 # === QMP 3.3.12 enhanced logging bootstrap ================================
 def _qmp_enhance_bootstrap():
     """Install JSONL logging, capture unhandled errors, hook QGIS MessageLog (LogSafe)."""
-    import os, re, sys, json, logging, traceback, time
-    from collections import defaultdict, deque
+    import os, re, sys, logging, traceback
     from datetime import datetime, timezone
     try:
         from qgis.core import QgsApplication
@@ -623,25 +960,10 @@ def _qmp_enhance_bootstrap():
         json_path = os.path.join(log_dir, f"qgis_json_{ts}{suffix}.jsonl")
         globals()["JSON_PATH"] = json_path
 
-    class _JsonlHandler(logging.Handler):
-        def __init__(self, path):
-            super().__init__(logging.DEBUG)
-            self._path = path
-            try: os.makedirs(os.path.dirname(path), exist_ok=True)
-            except Exception: pass
-        def emit(self, record):
-            try:
-                obj = { "ts": datetime.now(timezone.utc).isoformat(),
-                        "level": record.levelname,
-                        "msg": record.getMessage() }
-                with open(self._path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-            except Exception:
-                pass
-
+    # JSONL via de bestaande gebufferde JsonWriter-sink i.p.v. open/append per record
     try:
-        if not any(h.__class__.__name__.lower().startswith("jsonl") for h in list(log.handlers)):
-            log.addHandler(_JsonlHandler(json_path))
+        if _mux is not None and globals().get("jh") is None:
+            globals()["jh"] = JsonWriter(json_path); _mux.add_sink(_json_sink)
     except Exception:
         pass
 
@@ -679,6 +1001,8 @@ def _qmp_enhance_bootstrap():
         if QgsApplication is not None:
             def on_msg(message, tag, level):
                 try:
+                    if level < 1 and not log.isEnabledFor(logging.INFO):
+                        return
                     if tag and str(tag).lower().startswith("qgismonitorpro"):
                         return
                     if "[stderr]" in str(message) or "Traceback" in str(message):
@@ -693,84 +1017,52 @@ def _qmp_enhance_bootstrap():
     except Exception:
         pass
 
-    try:
+    def _update_latest():
         latest = os.path.join(log_dir, "latest.txt")
-        cur = {}
-        if os.path.exists(latest):
+        try:
             with open(latest, "r", encoding="utf-8") as f:
-                for ln in f:
-                    if "=" in ln:
-                        k, v = ln.strip().split("=", 1); cur[k] = v
+                cur = dict(ln.split("=", 1) for ln in f.read().splitlines() if "=" in ln)
+        except FileNotFoundError:
+            cur = {}
         cur["JSON"] = json_path
-        with open(latest, "w", encoding="utf-8") as f:
-            for k in ("FULL", "ERRORS", "JSON", "STARTED"):
-                if k in cur:
-                    f.write(f"{k}={cur[k]}\n")
-    except Exception:
-        pass
+        _write_atomic(latest, "".join(f"{k}={cur[k]}\n" for k in _LATEST_KEYS if k in cur))
+    try: _io_submit(_update_latest)
+    except Exception: pass
 
-    # LogSafe: rate limiter on all handlers + stop propagation
+    # LogSafe: rate limiter on the logger + stop propagation
     try:
-        class RateLimitFilter(logging.Filter):
-            def __init__(self, per_sec=20):
-                super().__init__()
-                self.per_sec = per_sec
-                self._bucket = defaultdict(deque)
-            def filter(self, record):
-                key = getattr(record, "msg", str(record))
-                dq = self._bucket[key]
-                now = time.time()
-                dq.append(now)
-                while dq and now - dq[0] > 1.0:
-                    dq.popleft()
-                return len(dq) <= self.per_sec
-
-        rlf = RateLimitFilter(per_sec=20)
-        for _h in log.handlers:
-            try:
-                _h.addFilter(rlf)
-            except Exception:
-                pass
+        # Eén filter op de logger: draait één keer per record, vóór elke handler
+        if not any(f.__class__.__name__ == "RateLimitFilter" for f in log.filters):
+            log.addFilter(RateLimitFilter(per_sec=20))
         log.propagate = False
     except Exception:
         pass
-
-    try:
-        latest = os.path.join(log_dir, "latest.txt")
-        cur = {}
-        if os.path.exists(latest):
-            with open(latest, "r", encoding="utf-8") as f:
-                for ln in f:
-                    if "=" in ln:
-                        k, v = ln.strip().split("=", 1); cur[k] = v
-        cur["JSON"] = json_path
-        with open(latest, "w", encoding="utf-8") as f:
-            for k in ("FULL", "ERRORS", "JSON", "STARTED"):
-                if k in cur:
-                    f.write(f"{k}={cur[k]}\n")
-    except Exception: pass
 # ==========================================================================
 
 
 
 # --- LogSafe: simple rate-limiter to avoid log storms ---------------------
-import time
-from collections import defaultdict, deque
-
 class RateLimitFilter(logging.Filter):
+    # Token bucket per sleutel: per_sec tokens/s, burst tot per_sec; state is (tokens, laatste bijvulling).
+    # Begrensd (LRU) zodat een storm met veel unieke meldingen het geheugen niet laat groeien.
+    MAX_KEYS = 4096
     def __init__(self, per_sec=20):
         super().__init__()
-        self.per_sec = per_sec
-        self._bucket = defaultdict(deque)
+        self.per_sec = float(per_sec)
+        self._bucket = OrderedDict()
+        self._lock = threading.Lock()  # logger-filter: draait in de GUI- én in taak-threads
+        self._now = time.monotonic  # lokaal: geen global/attribuut-lookup per record
 
     def filter(self, record):
-        try:
-            key = record.getMessage()
-        except Exception:
-            key = record.msg if hasattr(record, "msg") else "<?>"
-        dq = self._bucket[key]
-        now = time.time()
-        dq.append(now)
-        while dq and now - dq[0] > 1.0:
-            dq.popleft()
-        return len(dq) <= self.per_sec
+        # Zonder args (f-strings) is msg al de tekst; met args de geformatteerde (gecachete) melding
+        key = record.msg if not record.args else _record_msg(record)
+        if not isinstance(key, str): key = str(key)  # bv. log.info(some_dict): onhashbaar als sleutel
+        rate = self.per_sec; bucket = self._bucket
+        with self._lock:
+            now = self._now()
+            tokens, last = bucket.get(key, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            ok = tokens >= 1.0
+            bucket[key] = (tokens - 1.0 if ok else tokens, now); bucket.move_to_end(key)
+            if len(bucket) > self.MAX_KEYS: bucket.popitem(last=False)
+        return ok
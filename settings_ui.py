@@ -5,9 +5,10 @@ from qgis.PyQt.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QComboBox, QPushButton,
     QFileDialog, QSpinBox, QDoubleSpinBox, QDialogButtonBox, QGroupBox, QLineEdit, QFormLayout, QTabWidget, QWidget
 )
+from qgis.PyQt import sip
 from qgis.PyQt.QtCore import Qt, QFile, QTextStream
 from qgis.PyQt.QtGui import QIcon
-from qgis.core import Qgis, QgsApplication
+from qgis.core import Qgis, QgsApplication, QgsTask
 from qgis.PyQt.QtGui import QDesktopServices
 from qgis.PyQt.QtCore import QUrl
 from .utils import get_setting, set_setting, DEFAULTS, export_settings_json, import_settings_json, prune_logs_now, get_log_dir, post_webhook
@@ -18,6 +19,7 @@ class SettingsDialog(QDialog):
         self.setWindowTitle("QGIS Monitor Pro • Instellingen")
         self.setMinimumWidth(620)
         self._load_style()
+        self._initial = self._snapshot()
 
         main = QVBoxLayout(self)
 
@@ -198,9 +200,18 @@ class SettingsDialog(QDialog):
         QMessageBox.information(self, "QGIS Monitor Pro", "Import gelukt. Heropen Instellingen voor actuele waarden." if ok else "Import mislukt.")
 
     def _prune_now(self):
-        prune_logs_now()
-        from qgis.PyQt.QtWidgets import QMessageBox
-        QMessageBox.information(self, "QGIS Monitor Pro", "Opschonen voltooid.")
+        # Opschonen (evt. zippen) kan even duren: in een QgsTask zodat de dialoog blijft reageren
+        def _done(exc, result=None):
+            self._prune_task = None
+            from qgis.PyQt.QtWidgets import QMessageBox
+            # De taak kan klaar zijn nadat de dialoog al gesloten en verwijderd is
+            parent = None if sip.isdeleted(self) else self
+            if exc is not None:
+                QMessageBox.warning(parent, "QGIS Monitor Pro", f"Opschonen mislukt: {exc}")
+            else:
+                QMessageBox.information(parent, "QGIS Monitor Pro", "Opschonen voltooid.")
+        self._prune_task = QgsTask.fromFunction("QGIS Monitor Pro: opschonen", lambda _task: prune_logs_now(), on_finished=_done)
+        QgsApplication.taskManager().addTask(self._prune_task)
 
     def _test_webhook(self):
         url = get_setting("webhook_url", str)
@@ -210,7 +221,11 @@ class SettingsDialog(QDialog):
             return
         post_webhook(url, {"type":"test","ok":True})
 
+    def _snapshot(self):
+        return tuple(get_setting(k) for k in DEFAULTS)
+
     def apply(self):
+        """Schrijf de instellingen weg; geeft True als er iets gewijzigd is."""
         set_setting("log_dir", "" if self.dir_label.text() == "(auto)" else self.dir_label.text())
         set_setting("keep_full", int(self.ret_full.value()))
         set_setting("keep_errs", int(self.ret_err.value()))
@@ -241,3 +256,4 @@ class SettingsDialog(QDialog):
         set_setting("prune_on_start", self.prune_start.isChecked())
         set_setting("realtime_view", self.realtime.isChecked())
         set_setting("gzip_rotate", self.gzip_rotate.isChecked())
+        return self._snapshot() != self._initial
@@ -58,9 +58,21 @@ def get_setting(key, typ=None):
     default = DEFAULTS[key]
     return s.value(key, default, type=typ if typ is not None else type(default))
 
+_SETTINGS_CACHE = {}
+
+def cached_setting(key, typ=None):
+    # Voor hete paden (logfilters per record); set_setting() leegt de cache
+    try:
+        return _SETTINGS_CACHE[(key, typ)]
+    except KeyError:
+        val = _SETTINGS_CACHE[(key, typ)] = get_setting(key, typ)
+        return val
+
 def set_setting(key, val):
     s = settings()
     s.setValue(key, val)
+    _SETTINGS_CACHE.clear()
+
 def get_log_dir() -> str:
     d = get_setting("log_dir", str)
     if d:
@@ -118,8 +130,9 @@ def bundle_logs_zip(zip_path: str, files: list, extra_texts: dict = None):
         with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
 
             for p in files:
-                if p and os.path.exists(p):
-                    z.write(p, os.path.basename(p))
+                if not p: continue
+                try: z.write(p, os.path.basename(p))
+                except FileNotFoundError: pass  # aanroeper heeft al gecontroleerd; alleen een race vangen
             if extra_texts:
                 for name, txt in extra_texts.items():
                     z.writestr(name, txt or "")
@@ -163,7 +176,12 @@ def import_settings_json(path: str) -> bool:
 
 def _prune_pattern(dirpath, pattern, keep=50, compress=False):
     try:
-        files = sorted(glob.glob(os.path.join(dirpath, pattern)))
+        # Eén scandir-pass i.p.v. glob; fnmatch/normcase houden Windows hoofdletterongevoelig zoals glob
+        import fnmatch
+        prefix = os.path.normcase(pattern.split("*", 1)[0])
+        with os.scandir(dirpath) as it:
+            files = sorted(e.path for e in it
+                           if os.path.normcase(e.name).startswith(prefix) and fnmatch.fnmatch(e.name, pattern) and e.is_file())
         old = files[:-int(keep)] if keep > 0 else files
         for p in old:
             if compress:
@@ -247,14 +265,18 @@ def write_diagnostics_txt():
     try:
         latest = os.path.join(base, "latest.txt")
         full = None
-        if os.path.exists(latest):
+        try:
             with open(latest, "r", encoding="utf-8") as f:
                 for ln in f:
                     if ln.startswith("FULL="):
                         full = ln.split("=", 1)[1].strip()
-        if full and os.path.exists(full):
+        except FileNotFoundError:
+            pass
+        # _tail opent zelf al; een leeg resultaat betekent ontbrekend/onleesbaar
+        tail = _tail(full, 80) if full else []
+        if tail:
             lines += ["", f"=== Tail of full log: {full} ==="]
-            lines += _tail(full, 80)
+            lines += tail
     except Exception:
         pass
 